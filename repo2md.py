@@ -1,9 +1,20 @@
 import os
+import re
+import sys
+import json
+import time
+import codecs
+import mmap
 import shutil
 import argparse
+import functools
+import itertools
+import collections
+import contextlib
+import concurrent.futures
 import pathspec
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple, Iterator, Set, Callable
 
 GITIGNORE_FILE = ".gitignore"
 DEFAULT_OUTPUT_FILE = "./output/repo_dump.md"
@@ -12,17 +23,100 @@ FILE_NAME_MARKER = "###### File: "
 TREE_HEADER = "### Structure:"
 CONTENT_HEADER = "### Contents:"
 CODE_BLOCK_MARKER = "````````````"
+BINARY_PLACEHOLDER = "[Binary file content skipped]"
+LARGE_FILE_PLACEHOLDER = "[Large file content skipped: {size} bytes]"
+MAX_FILE_SIZE = 0 # Default size (bytes) above which a file's content is replaced by LARGE_FILE_PLACEHOLDER; 0 for no limit
 BINARY_CHUNK_SIZE = 1024 # Bytes to read for binary detection
+# Extensions treated as binary without reading the file at all
+BINARY_EXTENSIONS = frozenset({
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.ico',
+    '.pdf', '.zip', '.gz', '.tar', '.7z', '.xz', '.bz2', '.rar', '.jar', '.whl',
+    '.so', '.dll', '.dylib', '.exe', '.o', '.a', '.lib', '.class', '.pyc', '.wasm', '.bin',
+    '.mp3', '.mp4', '.mov', '.ttf', '.otf', '.woff', '.woff2',
+})
+WRITE_BUFFER_SIZE = 1 << 20 # Output buffer size for the dump file
+WALK_WORKERS = min(32, (os.cpu_count() or 1) * 2) # Threads listing directories in list_files
+WALK_BATCH_DIRS = 32 # Directories walked per thread pool task before handing the rest back
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4) # Threads reading file contents ahead of the writer
+RESTORE_WORKERS = min(32, (os.cpu_count() or 1) * 4) # Threads writing restored files
+READ_AHEAD_FILES = 256 # Max files read ahead of the writer (bounds memory use and files held open)
+READ_BATCH_FILES = 16 # Files read per thread pool task
+STREAM_MIN_SIZE = 256 * 1024 # Text files this large are copied into the dump without being held in memory
+STREAM_CHUNK_SIZE = 1 << 20 # Chunk size for checking and copying such files
+DUMP_INDEX_SUFFIX = ".idx" # Sidecar next to the dump recording where each file's content lies
+DUMP_INDEX_VERSION = 2
+RACY_WINDOW_NS = 2 * 10**9 # Files modified this recently are not indexed (mtime may not reflect a later edit)
+
+_SEP_IS_SLASH = os.sep == '/'
+# sendfile between regular files is only supported on Linux (macOS requires a socket)
+_HAS_SENDFILE = hasattr(os, 'sendfile') and sys.platform.startswith('linux')
+# On Windows DirEntry.inode() costs a stat per entry; elsewhere it comes free with the listing
+_INODE_FROM_LISTING = os.name != 'nt'
+_TO_SLASH = str.maketrans(os.sep, '/') # Single-char translate table, used only when os.sep != '/'
+
+# Compiled spec: path -> include flag of the last matching pattern, or None
+Matcher = Callable[[str], Optional[bool]]
+# (directory prefix relative to the repo root, file matcher, directory matcher)
+# for each applicable .gitignore, root first
+IgnoreChain = Tuple[Tuple[str, Matcher, Matcher], ...]
+_NAMED_GROUP_RE = re.compile(r'\(\?P<\w+>')
+# pathspec marks the '/' that only a directory may end in with this group
+_DIR_GROUP = '(?P<ps_d>/)'
+# pathspec's regex for a '*<literal>' pattern such as '*.log': a path component
+# ending in the literal, followed by '/' or the end (both tails pathspec has used)
+_SUFFIX_PATTERN_RE = re.compile(
+    r'\^\(\?:\.\+/\)\?\[\^/\]\*'
+    r'(?P<suffix>(?:\\[^A-Za-z0-9/]|[^\\\[\](){}.*+?^$|/])+)'
+    r'(?:\(\?:\(\?P<ps_d>/\)\|\$\)|\(\?:\(\?P<ps_d>/\)\.\*\)\?\$)$'
+)
+
+# Pre-encoded markers for the binary-mode dump writer
+_FILE_NAME_MARKER_B = FILE_NAME_MARKER.encode('utf-8')
+_CODE_BLOCK_MARKER_B = CODE_BLOCK_MARKER.encode('utf-8')
+_CODE_BLOCK_CLOSE_B = f"{CODE_BLOCK_MARKER}\n\n".encode('utf-8')
+_BINARY_PLACEHOLDER_B = BINARY_PLACEHOLDER.encode('utf-8')
+_LARGE_FILE_PLACEHOLDER_RE = re.compile(
+    re.escape(LARGE_FILE_PLACEHOLDER).replace(re.escape('{size}'), r'\d+').encode('utf-8')
+)
+_FILE_NAME_LINE_B = b"\n" + _FILE_NAME_MARKER_B # File marker at the start of a line
+# One file block: marker line, opening code block line (any language suffix, after
+# any stray lines), then whole content lines up to the next line starting with the
+# marker. Matching the body line by line lets [^\n]* run as a fast inner loop.
+_FILE_BLOCK_RE = re.compile(
+    rb'^' + re.escape(_FILE_NAME_MARKER_B) + rb'(?P<name>[^\n]*)\n'
+    + rb'(?:[^\n]*\n)*?' + re.escape(_CODE_BLOCK_MARKER_B) + rb'[^\n]*\n'
+    + rb'(?P<body>(?:[^\n]*\n)*?)' + re.escape(_CODE_BLOCK_MARKER_B),
+    re.MULTILINE
+)
+
+def _posix_str(path) -> str:
+    """Returns the path as a string with '/' separators (no scan at all on POSIX)."""
+    path_str = os.fspath(path)
+    return path_str if _SEP_IS_SLASH else path_str.translate(_TO_SLASH)
+
+def _path_sort_key(relative_path_str: str) -> List[str]:
+    """Sort key for '/'-separated relative paths matching how Path objects order."""
+    if not _SEP_IS_SLASH:
+        relative_path_str = relative_path_str.lower() # Windows paths compare case-insensitively
+    return relative_path_str.split('/')
+
+def _is_binary_chunk(data: bytes) -> bool:
+    """Checks the first BINARY_CHUNK_SIZE bytes of already-read data for a null byte."""
+    # A bounded find (a single memchr) instead of slicing the chunk off first
+    return data.find(b'\x00', 0, BINARY_CHUNK_SIZE) != -1
 
 def is_binary(file_path: Path) -> bool:
     """
     Checks if a file is likely binary by reading a chunk and looking for null bytes.
     Handles potential read errors gracefully.
+
+    Kept for external callers; dump_repo uses _read_for_dump, which performs the
+    same check on the buffer it reads anyway instead of opening the file twice.
     """
     try:
         with file_path.open('rb') as f:
             chunk = f.read(BINARY_CHUNK_SIZE)
-        return b'\x00' in chunk
+        return _is_binary_chunk(chunk)
     except IOError as e:
         print(f"Warning: Could not read file {file_path} for binary check: {e}")
         return False # Assume not binary if read fails
@@ -30,20 +124,217 @@ def is_binary(file_path: Path) -> bool:
         print(f"Warning: Unexpected error checking if {file_path} is binary: {e}")
         return False # Assume not binary on unexpected errors
 
-def load_gitignore(repo_path: Path) -> Optional[pathspec.PathSpec]:
-    """
-    Loads the .gitignore file from the repository root.
+@functools.lru_cache(maxsize=64)
+def _compile_spec(patterns: Tuple[str, ...]) -> pathspec.PathSpec:
+    """Compiles (and caches) a gitwildmatch PathSpec for a tuple of patterns."""
+    return pathspec.PathSpec.from_lines('gitwildmatch', patterns)
 
-    Args:
-        repo_path: Path to the repository root directory.
+def _normalize_text(data: bytes) -> bytes:
+    """
+    Returns file content as it goes into the dump: valid UTF-8 (the common
+    case) is kept untouched, anything else has its undecodable bytes dropped,
+    and line endings are normalized to \n.
+    """
+    if not data.isascii():
+        try:
+            data.decode('utf-8')
+        except UnicodeDecodeError:
+            data = data.decode('utf-8', errors='ignore').encode('utf-8')
+    # Ensure consistent line endings (replace windows \r\n with \n)
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    return data
+
+def _read_for_dump(file_path: Path, max_file_size: int = 0) -> Tuple[str, Any]:
+    """
+    Reads a file for dumping in a single open and classifies it.
 
     Returns:
-        A pathspec.PathSpec object if .gitignore exists and is readable, None otherwise.
+        ('binary', None) if the extension is in BINARY_EXTENSIONS (without
+        reading the file) or the first chunk contains a null byte;
+        ('large', size) if max_file_size is set and the file is larger
+        (known from fstat; only its first chunk is read, for the binary check);
+        ('stream', (open_file, size)) for a file of at least STREAM_MIN_SIZE
+        bytes that is valid UTF-8 without CRs, i.e. needs no rewriting; the
+        checked file is left open for the caller to copy its first size bytes
+        into the dump with _copy_into_dump and then close, so a file replaced
+        in between (log rotation, say) cannot slip in unchecked;
+        ('text', content_bytes) otherwise, already passed through
+        _normalize_text so the reading thread does that work, not the writer.
     """
-    gitignore_path = repo_path / GITIGNORE_FILE
-    if not gitignore_path.is_file():
-        print(f"Info: No {GITIGNORE_FILE} found in {repo_path}")
-        return None
+    if file_path.suffix.lower() in BINARY_EXTENSIONS:
+        return 'binary', None # No need to even open it
+    # Unbuffered: every read below is a whole-file or large-chunk read anyway
+    f = open(file_path, 'rb', buffering=0)
+    keep_open = False
+    try:
+        size = os.fstat(f.fileno()).st_size
+        if max_file_size and size > max_file_size:
+            # Binary files still go to the end of the dump, whatever their size
+            if _is_binary_chunk(f.read(BINARY_CHUNK_SIZE)):
+                return 'binary', None
+            return 'large', size
+        if size < STREAM_MIN_SIZE:
+            # Small file: one read for the whole content, then check it in memory
+            data = f.read()
+            if _is_binary_chunk(data):
+                return 'binary', None
+            return 'text', _normalize_text(data)
+
+        chunk = f.read(STREAM_CHUNK_SIZE)
+        if _is_binary_chunk(chunk):
+            return 'binary', None
+        # Large file: check it chunk by chunk instead of holding it all in memory
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        size = 0
+        try:
+            while chunk:
+                if b"\r" in chunk:
+                    break
+                decoder.decode(chunk)
+                size += len(chunk)
+                chunk = f.read(STREAM_CHUNK_SIZE)
+            else:
+                decoder.decode(b'', final=True)
+                keep_open = True
+                return 'stream', (f, size)
+        except UnicodeDecodeError:
+            pass
+        f.seek(0)
+        return 'text', _normalize_text(f.read())
+    finally:
+        if not keep_open:
+            f.close()
+
+def _copy_into_dump(out, src, offset: int, size: int) -> Tuple[int, bytes]:
+    """
+    Appends size bytes of the open binary file src, starting at offset, to the
+    dump. Large ranges are copied by the kernel with os.sendfile where available;
+    anything else goes through the dump's buffer in STREAM_CHUNK_SIZE pieces.
+
+    Returns the number of bytes copied, fewer than size if src shrank since it
+    was checked, and the last byte copied (b'' if none).
+    """
+    start, end = offset, offset + size
+    if _HAS_SENDFILE and size >= STREAM_MIN_SIZE:
+        out.flush() # Buffered dump data must land before the kernel appends to the fd
+        try:
+            while offset < end:
+                sent = os.sendfile(out.fileno(), src.fileno(), offset, end - offset)
+                if sent == 0:
+                    break # Source shrank since it was checked
+                offset += sent
+            # The kernel copied it, so read the last byte back from the source
+            return offset - start, os.pread(src.fileno(), 1, offset - 1) if offset > start else b''
+        except OSError:
+            pass # e.g. unsupported by the filesystem; copy the rest below
+    src.seek(offset)
+    last_byte = b''
+    while offset < end:
+        chunk = src.read(min(STREAM_CHUNK_SIZE, end - offset))
+        if not chunk:
+            break
+        out.write(chunk)
+        offset += len(chunk)
+        last_byte = chunk[-1:]
+    return offset - start, last_byte
+
+def _is_index_entry(entry: Any, dump_size: int) -> bool:
+    """Checks that a dump index entry is [mtime_ns, size, start, end] pointing inside the dump."""
+    if not (isinstance(entry, list) and len(entry) == 4
+            and all(type(value) is int for value in entry)): # type(): bool is an int too
+        return False
+    start, end = entry[2], entry[3]
+    return start == end == -1 or 0 <= start <= end <= dump_size
+
+def _load_dump_index(
+    index_path: Path, dump_path: Path, repo_root: str, max_file_size: int
+) -> Dict[str, List[int]]:
+    """
+    Loads the sidecar index written by the previous incremental dump, mapping
+    each relative path to [mtime_ns, size, content start, content end] in that
+    dump (start and end are -1 for binary files).
+
+    Returns an empty dict if the index is missing, unreadable or malformed, if
+    it does not describe the dump file as it currently is on disk, or if that
+    dump was made of another repository (repo_root, resolved) or with a
+    different max_file_size.
+    """
+    try:
+        with index_path.open('r', encoding='utf-8') as f:
+            index = json.load(f)
+        dump_stat = dump_path.stat()
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read dump index {index_path}: {e}")
+        return {}
+    if (not isinstance(index, dict) or index.get('version') != DUMP_INDEX_VERSION
+            or index.get('dump') != [dump_stat.st_size, dump_stat.st_mtime_ns]
+            or index.get('repo') != repo_root
+            or index.get('max_file_size') != max_file_size):
+        print(f"Info: Ignoring stale dump index {index_path}")
+        return {}
+    files = index.get('files')
+    if not (isinstance(files, dict)
+            and all(_is_index_entry(entry, dump_stat.st_size) for entry in files.values())):
+        print(f"Info: Ignoring malformed dump index {index_path}")
+        return {}
+    return files
+
+def _save_dump_index(
+    index_path: Path, dump_path: Path, repo_root: str, max_file_size: int, files: Dict[str, List[int]]
+) -> None:
+    """Writes the sidecar index for dump_path; see _load_dump_index for the format."""
+    dump_stat = dump_path.stat()
+    with index_path.open('w', encoding='utf-8') as f:
+        json.dump({
+            'version': DUMP_INDEX_VERSION,
+            'dump': [dump_stat.st_size, dump_stat.st_mtime_ns],
+            'repo': repo_root,
+            'max_file_size': max_file_size,
+            'files': files,
+        }, f)
+
+def _read_batch(
+    file_paths: List[Path], max_file_size: int
+) -> List[Tuple[Optional[Tuple[str, Any]], Optional[Exception]]]:
+    """Runs _read_for_dump on each path, returning (result, None) or (None, error) per path."""
+    outcomes: List[Tuple[Optional[Tuple[str, Any]], Optional[Exception]]] = []
+    for path in file_paths:
+        try:
+            outcomes.append((_read_for_dump(path, max_file_size), None))
+        except Exception as e:
+            outcomes.append((None, e))
+    return outcomes
+
+def _read_ahead(file_paths: List[Path], max_file_size: int = 0) -> Iterator[Tuple[Optional[Tuple[str, Any]], Optional[Exception]]]:
+    """
+    Yields _read_batch's (result, error) outcome for each path, in order.
+    Reads run on a thread pool in batches of READ_BATCH_FILES (one task per
+    batch, so small files don't each pay for a future and a thread handoff),
+    at most READ_AHEAD_FILES ahead of the consumer.
+    """
+    batches = (file_paths[i:i + READ_BATCH_FILES] for i in range(0, len(file_paths), READ_BATCH_FILES))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        pending = collections.deque(
+            executor.submit(_read_batch, batch, max_file_size)
+            for batch in itertools.islice(batches, max(1, READ_AHEAD_FILES // READ_BATCH_FILES))
+        )
+        while pending:
+            future = pending.popleft()
+            next_batch = next(batches, None)
+            if next_batch is not None:
+                pending.append(executor.submit(_read_batch, next_batch, max_file_size))
+            yield from future.result()
+
+@functools.lru_cache(maxsize=256)
+def _load_gitignore_cached(gitignore_path_str: str, mtime_ns: int) -> Optional[pathspec.PathSpec]:
+    """
+    Reads and parses a .gitignore file. Cached per (path, mtime) so repeated
+    dumps in the same process only re-parse the files that changed.
+    """
+    gitignore_path = Path(gitignore_path_str)
     try:
         encodings_to_try = ['utf-8', 'latin-1', 'cp1252']
         content = None
@@ -51,10 +342,10 @@ def load_gitignore(repo_path: Path) -> Optional[pathspec.PathSpec]:
             try:
                 with gitignore_path.open('r', encoding=enc) as f:
                     content = f.readlines()
-                print(f"Info: Successfully read {GITIGNORE_FILE} with encoding '{enc}'")
+                print(f"Info: Successfully read {gitignore_path} with encoding '{enc}'")
                 break
             except UnicodeDecodeError:
-                print(f"Warning: Failed to read {GITIGNORE_FILE} with encoding '{enc}'")
+                print(f"Warning: Failed to read {gitignore_path} with encoding '{enc}'")
                 continue
             except Exception as e:
                 print(f"Warning: Could not read {gitignore_path} with encoding '{enc}': {e}")
@@ -72,6 +363,133 @@ def load_gitignore(repo_path: Path) -> Optional[pathspec.PathSpec]:
         print(f"Warning: Error parsing {gitignore_path}: {e}")
         return None
 
+def load_gitignore(repo_path: Path) -> Optional[pathspec.PathSpec]:
+    """
+    Loads the .gitignore file from the repository root.
+
+    Args:
+        repo_path: Path to the repository root directory.
+
+    Returns:
+        A pathspec.PathSpec object if .gitignore exists and is readable, None otherwise.
+    """
+    gitignore_path = repo_path / GITIGNORE_FILE
+    if not gitignore_path.is_file():
+        print(f"Info: No {GITIGNORE_FILE} found in {repo_path}")
+        return None
+    try:
+        mtime_ns = gitignore_path.stat().st_mtime_ns
+    except OSError as e:
+        print(f"Warning: Could not open {gitignore_path}: {e}")
+        return None
+    return _load_gitignore_cached(str(gitignore_path), mtime_ns)
+
+@functools.lru_cache(maxsize=256)
+def _compile_matcher_cached(patterns: Tuple[Tuple[str, bool], ...], directories: bool) -> Matcher:
+    """Builds the matcher for a tuple of (pattern regex, include flag) pairs; see _compile_matcher."""
+    # Consecutive patterns with the same include flag form a run; one alternation
+    # regex per run. Named groups are made non-capturing since pathspec reuses names.
+    # '*<literal>' patterns (typically '*.ext') are pulled out of the alternation
+    # into a single search for any of the literals at the end of a component:
+    # re does not factor the shared '^(?:.+/)?[^/]*' prefix of the alternatives,
+    # so matching them one by one is what makes long extension lists slow.
+    runs: List[Tuple[bool, List[str], List[str]]] = []
+    for regex, include in patterns:
+        if not runs or runs[-1][0] != include:
+            runs.append((include, [], []))
+        suffix_match = _SUFFIX_PATTERN_RE.match(regex)
+        if suffix_match:
+            runs[-1][2].append(suffix_match.group('suffix'))
+        else:
+            if directories:
+                # A directory may end where pathspec expects its trailing '/'
+                regex = regex.replace(_DIR_GROUP, '(?:/|$)')
+            if not regex.startswith('^'):
+                # pathspec searches; a few regexes ('*/' is '(?P<ps_d>/)') are unanchored
+                regex = '(?s:.*?)' + regex
+            runs[-1][1].append(_NAMED_GROUP_RE.sub('(?:', regex))
+    # Later patterns take precedence, so runs are tried last to first
+    compiled_runs = []
+    for include, regexes, suffixes in reversed(runs):
+        alternatives = [f'(?:{regex})' for regex in regexes]
+        if suffixes:
+            suffix_search = re.compile('(?:' + '|'.join(suffixes) + ')(?=/|$)').search
+            if not alternatives:
+                compiled_runs.append((include, suffix_search))
+                continue
+            # Search for the literals first: it is the cheaper test of the two
+            alternatives_match = re.compile('|'.join(alternatives)).match
+            run_match: Callable[[str], Any] = (
+                lambda path, search=suffix_search, match=alternatives_match: search(path) or match(path)
+            )
+        else:
+            run_match = re.compile('|'.join(alternatives)).match
+        compiled_runs.append((include, run_match))
+
+    def match(path: str) -> Optional[bool]:
+        for include, run_match in compiled_runs:
+            if run_match(path):
+                return include
+        return None
+    return match
+
+def _compile_matcher(spec: pathspec.PathSpec, directories: bool = False) -> Matcher:
+    """
+    Compiles a gitwildmatch spec into a function returning the include flag of
+    the last pattern matching a path (git's last-match-wins rule): True if
+    matched, False if re-included by a '!' pattern, None if nothing matches.
+
+    Each run of same-polarity patterns is combined into one regex, so a path is
+    tested with a single C-level regex match per run instead of a Python loop
+    over every pattern. Evaluating runs from last to first is exact, so specs
+    with '!' patterns need no fallback to pathspec's own match_file.
+
+    With directories=True the matcher takes a directory path without its
+    trailing '/'. Matching 'foo/' instead would let 'foo/**' (regex '^foo/')
+    match the directory itself, while git only matches what is inside it.
+    """
+    return _compile_matcher_cached(tuple(
+        (pattern.regex.pattern, pattern.include)
+        for pattern in spec.patterns
+        if pattern.include is not None
+    ), directories)
+
+def _is_gitignored(path: str, ignore_chain: IgnoreChain, directory: bool = False) -> bool:
+    """
+    Matches a repo-relative path against a chain of (directory prefix, matcher,
+    directory matcher) entries ordered root first. Each matcher sees the path
+    relative to its own directory; the deepest .gitignore with a matching
+    pattern decides, falling through to its parents otherwise. A directory is
+    passed without its trailing '/' and with directory=True.
+    """
+    for base, match, dir_match in reversed(ignore_chain):
+        verdict = (dir_match if directory else match)(path[len(base):])
+        if verdict is not None:
+            return verdict
+    return False
+
+
+def _include_dir_prefixes(include_patterns: List[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Returns the literal directory prefix (e.g. 'venv/config/' for 'venv/config/*')
+    of every include pattern, so list_files can tell which gitignored directories
+    no include pattern could re-include anything from. Returns None if some
+    pattern has no such prefix, e.g. '*.py' or 'build/', which match at any depth.
+    """
+    prefixes = []
+    for pattern in include_patterns:
+        pattern = pattern.strip()
+        if not pattern or pattern.startswith(('#', '!')):
+            continue # Comments and negations never include anything
+        # Only a '/' before the end anchors a gitwildmatch pattern to the root
+        if '/' not in pattern.rstrip('/'):
+            return None
+        literal = re.split(r'[*?\[\\]', pattern.lstrip('/'), maxsplit=1)[0]
+        prefix = literal[:literal.rfind('/') + 1]
+        if not prefix:
+            return None
+        prefixes.append(prefix)
+    return tuple(prefixes)
 
 def list_files(
     repo_path: Path,
@@ -86,7 +504,8 @@ def list_files(
 
     Args:
         repo_path: Path to the repository root directory.
-        gitignore_spec: The loaded pathspec.PathSpec object from .gitignore.
+        gitignore_spec: The loaded pathspec.PathSpec object from the root .gitignore.
+            Nested .gitignore files are picked up during the walk.
         include_patterns: List of glob patterns to explicitly include.
         exclude_patterns: List of glob patterns to explicitly exclude.
         output_file_path: The absolute path to the output file being generated.
@@ -94,222 +513,535 @@ def list_files(
     Returns:
         A list of Path objects, relative to the repo_path.
     """
-    file_list: List[Path] = []
+    return [
+        Path(relative_path_str)
+        for relative_path_str in _list_relative_path_strs(
+            repo_path, gitignore_spec, include_patterns, exclude_patterns, output_file_path
+        )
+    ]
+
+def _list_relative_path_strs(
+    repo_path: Path,
+    gitignore_spec: Optional[pathspec.PathSpec],
+    include_patterns: Optional[List[str]],
+    exclude_patterns: Optional[List[str]],
+    output_file_path: Path
+) -> List[str]:
+    """
+    Does the work of list_files, returning the sorted relative paths as the
+    '/'-separated strings the walk builds them as (from the parent's relative
+    path and the entry name), so callers that need strings don't convert back.
+    """
+    file_list: List[str] = []
     abs_repo_path = repo_path.resolve()
-
-    include_spec = pathspec.PathSpec.from_lines('gitwildmatch', include_patterns or [])
-    exclude_spec = pathspec.PathSpec.from_lines('gitwildmatch', exclude_patterns or [])
-
-    for item in abs_repo_path.rglob('*'):
-        if item.resolve() == output_file_path:
-            print(f"Info: Skipping self (output file): {item}")
-            continue
-
+    root_str = str(abs_repo_path)
+    # Identify the output file (if it already exists) by device and inode, stat-ed
+    # once; this also catches it being reached through a symlink or hard link.
+    # Where inodes are not free (Windows), compare relative paths instead.
+    output_key: Optional[Tuple[int, int]] = None
+    output_rel_str: Optional[str] = None
+    if _INODE_FROM_LISTING:
+        try:
+            output_stat = os.stat(output_file_path)
+            output_key = (output_stat.st_dev, output_stat.st_ino)
+        except OSError:
+            pass
+    else:
         try:
-            relative_path = item.relative_to(abs_repo_path)
+            output_rel_str = _posix_str(output_file_path.relative_to(abs_repo_path))
         except ValueError:
-            print(f"Warning: Skipping item outside repo base: {item}")
-            continue
-
-        if not item.is_file():
-            continue
+            pass # Output file is outside the repository
+
+    include_spec = _compile_spec(tuple(include_patterns or ()))
+    exclude_spec = _compile_spec(tuple(exclude_patterns or ()))
+    include_match = _compile_matcher(include_spec)
+    exclude_match = _compile_matcher(exclude_spec)
+    exclude_dir_match = _compile_matcher(exclude_spec, directories=True)
+    # Empty specs never match; skip their matcher calls in the loop below
+    check_include = bool(include_spec.patterns)
+    check_exclude = bool(exclude_spec.patterns)
+    # Include patterns may re-include files below a gitignored directory, so an
+    # ignored directory is only pruned when no include pattern can reach into it
+    include_prefixes = _include_dir_prefixes(include_patterns) if check_include else ()
+    prune_gitignored = include_prefixes is not None
+
+    # os.scandir walk: DirEntry caches the file type from the directory listing,
+    # so no extra stat() per entry and no Path object at all. Each pending
+    # directory carries the chain of .gitignore specs that apply to it and its
+    # relative path ('' for the root, else ending in '/'), which entry names are
+    # appended to, so paths are never sliced from the absolute path or translated.
+    def scan_dir(
+        current_dir: str, ignore_chain: IgnoreChain, relative_dir_prefix: str
+    ) -> Tuple[List[str], List[Tuple[str, IgnoreChain, str]]]:
+        """Returns the kept files of one directory and the subdirectories to descend into."""
+        files: List[str] = []
+        subdirs: List[Tuple[str, IgnoreChain, str]] = []
+        try:
+            with os.scandir(current_dir) as it:
+                entries = list(it)
+        except OSError as e:
+            print(f"Warning: Could not list directory {current_dir}: {e}")
+            return files, subdirs
+
+        if relative_dir_prefix: # The root .gitignore is passed in as gitignore_spec
+            for entry in entries:
+                if entry.name == GITIGNORE_FILE and entry.is_file():
+                    try:
+                        nested_spec = _load_gitignore_cached(entry.path, entry.stat().st_mtime_ns)
+                    except OSError as e:
+                        print(f"Warning: Could not open {entry.path}: {e}")
+                        nested_spec = None
+                    if nested_spec:
+                        ignore_chain += ((relative_dir_prefix, _compile_matcher(nested_spec),
+                                          _compile_matcher(nested_spec, directories=True)),)
+                    break
 
-        if '.git' in relative_path.parts:
-            continue
+        for entry in entries:
+            if entry.name == '.git':
+                # Never descend into the .git directory, and skip the '.git' file
+                # worktrees and submodules use as a 'gitdir:' pointer as well
+                continue
+            relative_path_str = relative_dir_prefix + entry.name
+
+            if entry.is_dir(follow_symlinks=False):
+                relative_dir_str = relative_path_str + '/'
+                if check_exclude and exclude_dir_match(relative_path_str):
+                    continue
+                if (prune_gitignored and ignore_chain
+                        and _is_gitignored(relative_path_str, ignore_chain, directory=True)
+                        and not any(prefix.startswith(relative_dir_str) or relative_dir_str.startswith(prefix)
+                                    for prefix in include_prefixes)):
+                    continue
+                subdirs.append((entry.path, ignore_chain, relative_dir_str))
+                continue
 
-        relative_path_str = str(relative_path).replace(os.sep, '/')
+            if not entry.is_file():
+                continue
 
-        # 1. Check explicit excludes
-        if exclude_spec.match_file(relative_path_str):
-            # print(f"Debug: Excluding '{relative_path_str}' due to exclude pattern.")
-            continue
+            # DirEntry.inode() comes from the directory listing on POSIX, so only a
+            # candidate (or a symlink, whose own inode differs) needs a real stat
+            if output_key is not None and (entry.inode() == output_key[1] or entry.is_symlink()):
+                entry_stat = entry.stat()
+                if (entry_stat.st_dev, entry_stat.st_ino) == output_key:
+                    print(f"Info: Skipping self (output file): {entry.path}")
+                    continue
+            elif output_rel_str is not None and relative_path_str == output_rel_str:
+                print(f"Info: Skipping self (output file): {entry.path}")
+                continue
 
-        # 2. Check explicit includes (overrides .gitignore)
-        is_included = include_spec.match_file(relative_path_str)
-        if is_included:
-            # print(f"Debug: Including '{relative_path_str}' due to include pattern.")
-            file_list.append(relative_path)
-            continue
+            # 1. Check explicit excludes
+            if check_exclude and exclude_match(relative_path_str):
+                # print(f"Debug: Excluding '{relative_path_str}' due to exclude pattern.")
+                continue
 
-        # 3. Check .gitignore (if not explicitly included)
-        if gitignore_spec and gitignore_spec.match_file(relative_path_str):
-            # print(f"Debug: Excluding '{relative_path_str}' due to .gitignore.")
-            continue
+            # 2. Check explicit includes (overrides .gitignore)
+            if check_include and include_match(relative_path_str):
+                # print(f"Debug: Including '{relative_path_str}' due to include pattern.")
+                files.append(relative_path_str)
+                continue
 
-        # 4. If not excluded, not explicitly included, and not gitignored, add it.
-        # print(f"Debug: Including '{relative_path_str}' by default.")
-        file_list.append(relative_path)
+            # 3. Check .gitignore (if not explicitly included)
+            if ignore_chain and _is_gitignored(relative_path_str, ignore_chain):
+                # print(f"Debug: Excluding '{relative_path_str}' due to .gitignore.")
+                continue
 
-    return sorted(list(set(file_list))) # Use set to avoid duplicates if patterns overlap weirdly
+            # 4. If not excluded, not explicitly included, and not gitignored, add it.
+            # print(f"Debug: Including '{relative_path_str}' by default.")
+            files.append(relative_path_str)
+
+        return files, subdirs
+
+    def scan_subtree(
+        current_dir: str, ignore_chain: IgnoreChain, relative_dir_prefix: str
+    ) -> Tuple[List[str], List[Tuple[str, IgnoreChain, str]]]:
+        """
+        Walks up to WALK_BATCH_DIRS directories of one subtree depth-first,
+        returning the kept files and the directories still left to walk.
+        """
+        files: List[str] = []
+        stack = [(current_dir, ignore_chain, relative_dir_prefix)]
+        for _ in range(WALK_BATCH_DIRS):
+            if not stack:
+                break
+            dir_files, subdirs = scan_dir(*stack.pop())
+            files.extend(dir_files)
+            stack.extend(subdirs)
+        return files, stack
+
+    # Subtrees are walked on a thread pool (scandir and stat release the GIL), so
+    # the latency of many directory reads overlaps on large or cold trees; each
+    # task takes a batch of directories to keep the per-task overhead small. The
+    # result is sorted below, so completion order does not matter.
+    root_chain: IgnoreChain = ((
+        ('', _compile_matcher(gitignore_spec), _compile_matcher(gitignore_spec, directories=True)),
+    ) if gitignore_spec else ())
+    with concurrent.futures.ThreadPoolExecutor(max_workers=WALK_WORKERS) as executor:
+        pending = {executor.submit(scan_subtree, root_str, root_chain, '')}
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                file_list.extend(files)
+                pending.update(executor.submit(scan_subtree, *subdir) for subdir in subdirs)
+
+    # Every directory is listed exactly once (symlinked directories are not
+    # followed), so there are no duplicates to remove. Sort by components, which
+    # is the order sorting the Path objects would give.
+    file_list.sort(key=_path_sort_key)
+    return file_list
 
 
 def build_tree(files: List[Path]) -> Dict[str, Any]:
-    """Builds a nested dictionary representing the file tree structure."""
+    """
+    Builds a nested dictionary representing the file tree structure.
+
+    Consecutive (sorted) paths share directory prefixes, so a stack of the
+    currently open directory levels is kept and only the components past the
+    common prefix with the previous path are looked up or created.
+    """
     tree: Dict[str, Any] = {}
+    levels: List[Dict[str, Any]] = [tree] # levels[i] is the dict for prev_dirs[:i]
+    prev_dirs: Tuple[str, ...] = ()
     for file_path in files:
         parts = file_path.parts
-        current_level = tree
-        for i, part in enumerate(parts):
-            is_file = (i == len(parts) - 1)
-            if is_file:
-                if part in current_level and isinstance(current_level[part], dict):
-                    print(f"Warning: File '{file_path}' conflicts with an existing directory structure entry. Skipping file entry in tree.")
-                else:
-                    current_level[part] = None
-            else:
-                if part not in current_level:
-                    current_level[part] = {}
-                elif current_level[part] is None:
+        if not parts:
+            continue
+        dirs, name = parts[:-1], parts[-1]
+
+        common = 0
+        limit = min(len(dirs), len(prev_dirs))
+        while common < limit and dirs[common] == prev_dirs[common]:
+            common += 1
+        del levels[common + 1:]
+
+        for part in dirs[common:]:
+            current_level = levels[-1]
+            subtree = current_level.get(part)
+            if subtree is None:
+                if part in current_level:
                     print(f"Warning: Directory component '{part}' in '{file_path}' conflicts with an existing file entry. Overwriting file entry with directory in tree.")
-                    current_level[part] = {}
+                subtree = current_level[part] = {}
+            levels.append(subtree)
+        prev_dirs = dirs
 
-                if isinstance(current_level.get(part), dict):
-                    current_level = current_level[part]
-                else:
-                    print(f"Warning: Cannot traverse into '{part}' for path '{file_path}' due to tree conflict. Stopping tree branch here.")
-                    break
+        current_level = levels[-1]
+        if isinstance(current_level.get(name), dict):
+            print(f"Warning: File '{file_path}' conflicts with an existing directory structure entry. Skipping file entry in tree.")
+        else:
+            current_level[name] = None
     return tree
 
 
-def print_tree(tree: Dict[str, Any], prefix: str = '') -> List[str]:
-    """Generates a list of strings representing the directory tree structure."""
-    lines: List[str] = []
-    entries = sorted(tree.items(), key=lambda item: (isinstance(item[1], dict), item[0]))
+def print_tree(tree: Dict[str, Any], prefix: str = '') -> Iterator[str]:
+    """
+    Yields the lines representing the directory tree structure.
+
+    Iterative (explicit stack) so deep trees do not recurse; each directory's
+    children are sorted once, files before directories, then by name.
+    """
+    def sorted_entries(subtree: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        # A None value marks a file, so the key is a plain bool instead of an isinstance check
+        return sorted(subtree.items(), key=lambda item: (item[1] is not None, item[0]))
+
+    stack = [(sorted_entries(tree), 0, prefix)]
+    while stack:
+        entries, index, prefix = stack.pop()
+        if index == len(entries):
+            continue
+        stack.append((entries, index + 1, prefix)) # Resume with the next sibling afterwards
 
-    for i, (name, subtree) in enumerate(entries):
-        is_last = i == (len(entries) - 1)
+        name, subtree = entries[index]
+        is_last = index == (len(entries) - 1)
         connector = '└── ' if is_last else '├── '
 
         if subtree is None:
-            lines.append(f"{prefix}{connector}{name}")
+            yield f"{prefix}{connector}{name}"
         else:
-            lines.append(f"{prefix}{connector}{name}/")
+            yield f"{prefix}{connector}{name}/"
             extension = '    ' if is_last else '│   '
             if isinstance(subtree, dict):
-                lines.extend(print_tree(subtree, prefix + extension))
+                stack.append((sorted_entries(subtree), 0, prefix + extension))
             else:
                 print(f"Warning: Expected dictionary for directory '{name}' in tree, but found {type(subtree)}. Skipping recursion.")
 
-    return lines
-
 
 def dump_repo(
     repo_path: Path,
     output_file: Path,
     include_patterns: Optional[List[str]],
-    exclude_patterns: Optional[List[str]]
+    exclude_patterns: Optional[List[str]],
+    incremental: bool = False,
+    max_file_size: int = MAX_FILE_SIZE
 ):
     """
     Dumps the repository structure and file contents to a single markdown file,
     with binary files listed at the end.
+
+    Files larger than max_file_size bytes (0 for no limit) are not read; their
+    content is replaced by LARGE_FILE_PLACEHOLDER, which restore skips.
+
+    With incremental=True, an index of where each file's content lies in the
+    dump is kept next to it (output_file + DUMP_INDEX_SUFFIX); on the next run,
+    files whose mtime and size are unchanged are copied from the previous dump
+    instead of being read and processed again.
     """
     if not repo_path.is_dir():
         print(f"Error: Repository path '{repo_path}' not found or not a directory.")
         return
+    if max_file_size < 0:
+        print(f"Error: max_file_size must be 0 (no limit) or a positive number of bytes, got {max_file_size}.")
+        return
 
     output_file.parent.mkdir(parents=True, exist_ok=True)
     abs_output_file = output_file.resolve() # Resolve early for list_files
+    repo_root = str(repo_path.resolve()) # Recorded in the incremental index
+    index_path = output_file.with_name(output_file.name + DUMP_INDEX_SUFFIX)
+    temp_output_file = output_file.with_name(output_file.name + ".tmp")
+    racy_limit_ns = time.time_ns() - RACY_WINDOW_NS
 
     print(f"Loading .gitignore from {repo_path}...")
     gitignore_spec = load_gitignore(repo_path)
 
     print(f"Listing files in {repo_path}...")
-    all_files = list_files(repo_path, gitignore_spec, include_patterns, exclude_patterns, abs_output_file)
+    relative_path_strs = _list_relative_path_strs(
+        repo_path, gitignore_spec, include_patterns, exclude_patterns, abs_output_file
+    )
+    # Never dump the incremental index or temporary dump if they live inside the repo
+    sidecar_files = set()
+    for sidecar in ((index_path, temp_output_file) if incremental else ()):
+        try:
+            sidecar_files.add(_posix_str(sidecar.resolve().relative_to(repo_path.resolve())))
+        except ValueError:
+            pass
+    if sidecar_files:
+        relative_path_strs = [
+            relative_path_str for relative_path_str in relative_path_strs if relative_path_str not in sidecar_files
+        ]
+    all_files = [Path(relative_path_str) for relative_path_str in relative_path_strs]
     if not all_files:
         print("Warning: No files found to dump (after applying filters).")
         # Still create an empty dump file with headers if needed
         # return # Or decide to proceed and create an empty dump
 
-    print("Separating text and binary files...")
-    text_files: List[Path] = []
-    binary_files: List[Path] = []
-    for relative_path in all_files:
-        full_path = repo_path / relative_path
-        if is_binary(full_path):
-            binary_files.append(relative_path)
-            print(f"  Identified as binary: {relative_path}")
-        else:
-            text_files.append(relative_path)
-            print(f"  Identified as text: {relative_path}")
-    print(f"  Found {len(text_files)} text files and {len(binary_files)} binary files.")
-
     print(f"Building file tree for all {len(all_files)} files...")
     # Build tree using all files so structure representation is complete
     tree = build_tree(all_files)
 
+    # Per-file attributes the loops below need, computed once into parallel lists
+    # (next to relative_path_strs) so the loops don't go back to the Path objects
+    languages = [relative_path.suffix[1:] for relative_path in all_files]
+    full_paths = [repo_path / relative_path for relative_path in all_files]
+    file_stats: List[Optional[os.stat_result]] = [None] * len(all_files)
+    cache_entries: List[Optional[List[int]]] = [None] * len(all_files)
+    previous_index: Dict[str, List[int]] = {}
+    new_index: Dict[str, List[int]] = {}
+    if incremental:
+        previous_index = _load_dump_index(index_path, output_file, repo_root, max_file_size)
+        for i, full_path in enumerate(full_paths):
+            try:
+                file_stats[i] = full_path.stat()
+            except OSError:
+                continue
+            cache_entry = previous_index.get(relative_path_strs[i])
+            if cache_entry and cache_entry[:2] == [file_stats[i].st_mtime_ns, file_stats[i].st_size]:
+                cache_entries[i] = cache_entry
+        print(f"  {sum(entry is not None for entry in cache_entries)} of {len(all_files)} files unchanged since the previous dump.")
+
+    # The previous dump is read while the new one is written, so write to a temporary file
+    write_path = temp_output_file if previous_index else output_file
+
     print(f"Writing dump to {output_file}...")
     try:
-        with output_file.open('w', encoding='utf-8', newline='\n') as out:
+        with open(write_path, 'wb', buffering=WRITE_BUFFER_SIZE) as out, \
+                (output_file.open('rb') if previous_index else contextlib.nullcontext()) as previous_dump:
             repo_name = repo_path.resolve().name
-            out.write(f"# Repository: {repo_name}\n\n")
+            out.write(f"# Repository: {repo_name}\n\n".encode('utf-8'))
 
             # --- Write File Structure (based on all files) ---
-            out.write(f"{TREE_HEADER}\n")
-            out.write(f"{CODE_BLOCK_MARKER}\n")
-            out.write(f"/{repo_name}/\n")
-            tree_lines = print_tree(tree, prefix="    ")
-            out.write("\n".join(tree_lines))
-            out.write(f"\n{CODE_BLOCK_MARKER}\n\n")
+            out.write(f"{TREE_HEADER}\n{CODE_BLOCK_MARKER}\n/{repo_name}/\n".encode('utf-8'))
+            # Stream the lines straight to the buffered writer (no list, no join)
+            wrote_tree_line = False
+            for line in print_tree(tree, prefix="    "):
+                out.write(line.encode('utf-8') + b"\n")
+                wrote_tree_line = True
+            if not wrote_tree_line:
+                out.write(b"\n") # Keep the empty line an empty tree has always produced
+            out.write(_CODE_BLOCK_CLOSE_B)
 
             # --- Write File Contents ---
-            out.write(f"{CONTENT_HEADER}\n\n")
-
-            # Process text files first
-            if text_files:
-                #print("Writing text file contents...")
-                for relative_path in text_files:
-                    full_path = repo_path / relative_path
-                    relative_path_str = str(relative_path).replace(os.sep, '/')
+            out.write(f"{CONTENT_HEADER}\n\n".encode('utf-8'))
+
+            # Process text files first; binary files are detected while reading
+            # and collected so their placeholders can be written last
+            binary_files: List[int] = [] # Indices into the per-file lists
+            text_file_count = 0
+            reads = _read_ahead([
+                full_path for full_path, cache_entry in zip(full_paths, cache_entries) if cache_entry is None
+            ], max_file_size)
+            for i, (relative_path_str, full_path, file_stat, cache_entry) in enumerate(
+                zip(relative_path_strs, full_paths, file_stats, cache_entries)
+            ):
+                error: Optional[str] = None
+                if cache_entry is not None:
+                    kind, data = ('binary' if cache_entry[2] == -1 else 'cached'), cache_entry
+                else:
+                    outcome, read_error = next(reads)
+                    if read_error is None:
+                        kind, data = outcome
+                    elif isinstance(read_error, IOError):
+                        kind, data, error = 'text', b'', f"Error reading file: {read_error}\n"
+                    else:
+                        kind, data, error = 'text', b'', f"Error processing file: {read_error}\n"
+                # Only files that cannot have changed within their mtime's granularity are indexed
+                index_file = incremental and file_stat is not None and file_stat.st_mtime_ns < racy_limit_ns
+                if kind == 'binary':
+                    binary_files.append(i)
+                    if index_file:
+                        new_index[relative_path_str] = [file_stat.st_mtime_ns, file_stat.st_size, -1, -1]
+                    continue
+
+                text_file_count += 1
+                if kind == 'large':
+                    print(f"  Placeholder for large file ({data} bytes): {relative_path_str}")
+                    kind, data = 'text', LARGE_FILE_PLACEHOLDER.format(size=data).encode('utf-8')
+                else:
                     print(f"  Dumping text content: {relative_path_str}")
 
-                    out.write(f"{FILE_NAME_MARKER}{relative_path_str}\n")
-                    extension = relative_path.suffix
-                    lang_identifier = extension[1:] if extension else ''
-                    out.write(f"{CODE_BLOCK_MARKER}{lang_identifier}\n")
-
+                # Each block is written with as few calls as possible: the header
+                # is formatted once, and in-memory text goes out together with it
+                header = f"{FILE_NAME_MARKER}{relative_path_str}\n{CODE_BLOCK_MARKER}{languages[i]}\n".encode('utf-8')
+                content_start = out.tell() + len(header) if incremental else 0
+
+                if kind == 'text' and not error:
+                    # Already normalized by _read_for_dump on the reading thread; ensure newline at the end
+                    content_end = b"\n" if data and not data.endswith(b"\n") else b""
+                    out.write(b"".join((header, data, content_end, _CODE_BLOCK_CLOSE_B)))
+                    if index_file:
+                        content_stop = content_start + len(data) + len(content_end)
+                        new_index[relative_path_str] = [file_stat.st_mtime_ns, file_stat.st_size, content_start, content_stop]
+                    continue
+
+                out.write(header)
+                if error:
+                    out.write(error.encode('utf-8'))
+                elif kind == 'cached':
+                    # Already normalized (including the final newline) in the previous dump
+                    _copy_into_dump(out, previous_dump, data[2], data[3] - data[2])
+                else: # 'stream'
+                    src, size = data
+                    copied, last_byte = 0, b''
                     try:
-                        content = full_path.read_text(encoding='utf-8', errors='ignore')
-                        # Ensure consistent line endings (replace windows \r\n with \n)
-                        content = content.replace('\r\n', '\n').replace('\r', '\n')
-                        out.write(content)
-                        if content and not content.endswith('\n'):
-                            out.write('\n') # Ensure newline at the end
+                        with src:
+                            copied, last_byte = _copy_into_dump(out, src, 0, size)
                     except IOError as e:
-                        out.write(f"Error reading file: {e}\n")
-                    except Exception as e:
-                        out.write(f"Error processing file: {e}\n")
-
-                    out.write(f"{CODE_BLOCK_MARKER}\n\n")
+                        error = f"Error reading file: {e}\n"
+                    else:
+                        if copied < size:
+                            error = f"Error reading file: it shrank to {copied} of {size} bytes while being dumped\n"
+                    if copied and last_byte != b"\n":
+                        out.write(b"\n") # Ensure newline at the end, so the closing fence gets its own line
+                    if error:
+                        out.write(error.encode('utf-8'))
+
+                if index_file and not error:
+                    new_index[relative_path_str] = [file_stat.st_mtime_ns, file_stat.st_size, content_start, out.tell()]
+                out.write(_CODE_BLOCK_CLOSE_B)
 
             # Process binary files last
-            if binary_files:
-                #print("Writing binary file placeholders...")
-                # Optional: Add a small header indicating binary section
-                # out.write("---\n")
-                # out.write("### Binary Files (Content Skipped)\n\n")
+            for i in binary_files:
+                relative_path_str = relative_path_strs[i]
+                print(f"  Placeholder for binary: {relative_path_str}")
+
+                # Add language identifier even for binary for consistency, though less useful
+                out.write(
+                    f"{FILE_NAME_MARKER}{relative_path_str}\n{CODE_BLOCK_MARKER}{languages[i]}\n"
+                    f"{BINARY_PLACEHOLDER}\n{CODE_BLOCK_MARKER}\n\n".encode('utf-8')
+                )
+
+            print(f"  Dumped {text_file_count} text files and {len(binary_files)} binary files.")
+
+        if write_path != output_file:
+            os.replace(write_path, output_file)
+        if incremental:
+            _save_dump_index(index_path, output_file, repo_root, max_file_size, new_index)
+        print(f"Successfully dumped repository to {output_file}")
 
-                for relative_path in binary_files:
-                    # full_path = repo_path / relative_path # Not strictly needed for content
-                    relative_path_str = str(relative_path).replace(os.sep, '/')
-                    print(f"  Placeholder for binary: {relative_path_str}")
+    except IOError as e:
+        print(f"Error writing to output file {output_file}: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred during dumping: {e}")
+    finally:
+        # Don't leave a partial temporary dump behind if writing failed
+        if write_path != output_file:
+            try:
+                os.remove(write_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Warning: Could not remove temporary file {write_path}: {e}")
 
-                    out.write(f"{FILE_NAME_MARKER}{relative_path_str}\n")
-                    extension = relative_path.suffix
-                    lang_identifier = extension[1:] if extension else '' # Keep consistent structure
-                    # Add language identifier even for binary for consistency, though less useful
-                    out.write(f"{CODE_BLOCK_MARKER}{lang_identifier}\n")
 
-                    out.write("[Binary file content skipped]\n") # The placeholder
+def _iter_dump_files(dump: mmap.mmap) -> Iterator[Tuple[str, int, int]]:
+    """
+    Extracts file blocks from a memory-mapped dump in a single pass of the
+    compiled _FILE_BLOCK_RE (C-level regex engine) instead of a per-line state
+    machine.
 
-                    out.write(f"{CODE_BLOCK_MARKER}\n\n")
+    Yields:
+        (relative path, content start offset, content end offset) for each file
+        block, where the content slice includes its trailing newline.
+    """
+    pos = 0
+    for match in _FILE_BLOCK_RE.finditer(dump):
+        pos = match.end()
+        relative_path_str = match['name'].decode('utf-8').strip()
+
+        if not relative_path_str or ".." in relative_path_str:
+            line_num = dump[:match.start()].count(b"\n") + 1
+            if not relative_path_str:
+                print(f"Warning: Skipping empty file path found on line {line_num}")
+            else:
+                # Avoid paths trying to go outside the output_dir using '..'
+                print(f"Warning: Skipping potentially unsafe path '{relative_path_str}' on line {line_num}")
+            continue
 
+        yield relative_path_str, match.start('body'), match.end('body')
 
-        print(f"Successfully dumped repository to {output_file}")
+    # A file marker after the last complete block means the dump was cut short
+    marker_at = dump.find(_FILE_NAME_LINE_B, pos)
+    if marker_at != -1:
+        name_start = marker_at + len(_FILE_NAME_LINE_B)
+        name_end = dump.find(b"\n", name_start)
+        relative_path_str = dump[name_start:name_end if name_end != -1 else len(dump)].decode('utf-8').strip()
+        print(f"Warning: Dump file may have ended unexpectedly. File '{relative_path_str}' might be incomplete and was not restored.")
 
-    except IOError as e:
-        print(f"Error writing to output file {output_file}: {e}")
-    except Exception as e:
-        print(f"An unexpected error occurred during dumping: {e}")
+
+def _make_dirs(output_dir: Path, relative_dirs: Set[str]) -> None:
+    """
+    Creates the given '/'-separated directories under output_dir. Only the
+    deepest ones need a mkdir call: parents=True creates their ancestors.
+    """
+    # With a trailing '/', a directory's descendants sort directly after it
+    ordered = sorted(relative_dir + '/' for relative_dir in relative_dirs)
+    for index, relative_dir in enumerate(ordered):
+        if index + 1 < len(ordered) and ordered[index + 1].startswith(relative_dir):
+            continue # Created along with a deeper directory
+        directory = output_dir / relative_dir
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+        except IOError as e:
+            print(f"Error creating directory {directory}: {e}")
+        except Exception as e:
+            print(f"An unexpected error occurred creating directory {directory}: {e}")
+
+
+def _restore_file(full_output_path: Path, dump: mmap.mmap, start: int, end: int) -> None:
+    """
+    Writes one file's dumped bytes as-is: no decode/encode round trip and no
+    newline translation, so the content determines line endings.
+    """
+    with full_output_path.open('wb') as out_f:
+        out_f.write(dump[start:end])
 
 
 def restore_repo(input_file: Path, output_dir: Path):
@@ -338,92 +1070,52 @@ def restore_repo(input_file: Path, output_dir: Path):
         output_dir.mkdir(parents=True, exist_ok=True)
         print(f"Restoring repository from {input_file} into {output_dir}...")
 
-        with input_file.open('r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        current_file_path: Optional[Path] = None
-        content_buffer: List[str] = []
-        state = 0 # 0 = looking for file marker, 1 = looking for start code block, 2 = inside code block
-        inside_code_block = False
-
-        for line_num, line in enumerate(lines):
-            # Check for code block markers regardless of state to handle transitions
-            if line.strip().startswith(CODE_BLOCK_MARKER):
-                if not inside_code_block:
-                    # Entering a code block
-                    if state == 1: # We were expecting this after a file marker
-                        state = 2
-                    # Else: Could be the tree structure block, ignore content until next marker
-                    inside_code_block = True
-                else:
-                    # Exiting a code block
-                    if state == 2: # We were inside a file content block
-                        if current_file_path:
-                            full_output_path = output_dir / current_file_path
-                            # Join lines and potentially normalize line endings if needed during write
-                            file_content = "".join(content_buffer)
-
-                            if file_content.strip() == "[Binary file content skipped]":
-                                print(f"  Skipping restore (binary placeholder): {current_file_path}")
-                                # Optionally create an empty file or skip entirely
-                                try:
-                                    full_output_path.parent.mkdir(parents=True, exist_ok=True)
-                                    # Create an empty file to represent the binary file's presence
-                                    #with full_output_path.open('w', encoding='utf-8') as out_f:
-                                        #pass # Just create the file
-                                    #print(f"    (Created empty file for {current_file_path})")
-                                except IOError as e:
-                                    print(f"Error creating empty file placeholder {full_output_path}: {e}")
-                                except Exception as e:
-                                    print(f"An unexpected error occurred creating placeholder {full_output_path}: {e}")
-                            else:
-                                print(f"  Restoring: {current_file_path}")
-                                try:
-                                    full_output_path.parent.mkdir(parents=True, exist_ok=True)
-                                    # Use 'w' with newline='' to prevent adding extra CR on Windows
-                                    # Let the content determine line endings.
-                                    with full_output_path.open('w', encoding='utf-8', newline='') as out_f:
-                                        out_f.write(file_content)
-                                except IOError as e:
-                                    print(f"Error writing file {full_output_path}: {e}")
-                                except Exception as e:
-                                    print(f"An unexpected error occurred writing {full_output_path}: {e}")
-
-                        current_file_path = None
-                        content_buffer = []
-                        state = 0 # Look for the next file marker
-                    # Else: Exiting the tree structure block or some other block, just reset flag
-                    inside_code_block = False
-                continue # Skip processing the marker line itself as content
-
-            # --- State machine logic ---
-            if state == 0: # Looking for file marker
-                if line.startswith(FILE_NAME_MARKER):
-                    relative_path_str = line[len(FILE_NAME_MARKER):].strip()
-                    if not relative_path_str:
-                        print(f"Warning: Skipping empty file path found on line {line_num + 1}")
-                        continue
-                    # Sanitize path for security (though Path usually handles this well)
-                    # Avoid paths trying to go outside the output_dir using '..'
-                    if ".." in relative_path_str:
-                        print(f"Warning: Skipping potentially unsafe path '{relative_path_str}' on line {line_num + 1}")
-                        continue
+        if input_file.stat().st_size == 0:
+            # mmap cannot map an empty file, and there is nothing to restore anyway
+            print(f"Warning: Input dump file '{input_file}' is empty.")
+        else:
+            # Parent directories of every restored (or skipped) file, relative and
+            # '/'-separated; created in one batch once the scan is done
+            parent_dirs: Set[str] = set()
+            # Files to write, as full path -> content range in the dump. A later block
+            # for the same path replaces an earlier one, as it would overwrite it when
+            # written in order.
+            pending_writes: Dict[Path, Tuple[int, int]] = {}
+            with input_file.open('rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for relative_path_str, start, end in _iter_dump_files(mm):
                     current_file_path = Path(relative_path_str)
-                    content_buffer = []
-                    state = 1 # Now look for the start code block
-
-            # elif state == 1: # Looking for start code block
-                # This state is effectively handled by the general code block marker check above
-
-            elif state == 2: # Inside code block (and it's for a file)
-                if inside_code_block: # Double check we are still inside
-                    content_buffer.append(line)
-                # Else: Should have been transitioned out by marker check above
-
-        if state != 0:
-            print(f"Warning: Dump file may have ended unexpectedly or parsing finished in an intermediate state ({state}).")
-        if current_file_path is not None:
-            print(f"Warning: Processing ended while handling file '{current_file_path}'. It might be incomplete.")
+                    full_output_path = output_dir / current_file_path
+                    parent_dir = relative_path_str.rpartition('/')[0]
+                    if parent_dir:
+                        parent_dirs.add(parent_dir)
+
+                    # Only a short block can be a placeholder; avoids copying large contents
+                    block = mm[start:end].strip() if end - start < 2 * len(LARGE_FILE_PLACEHOLDER) else None
+                    is_placeholder = block is not None and (
+                        block == _BINARY_PLACEHOLDER_B or _LARGE_FILE_PLACEHOLDER_RE.fullmatch(block) is not None
+                    )
+                    if is_placeholder:
+                        kind = 'binary' if block == _BINARY_PLACEHOLDER_B else 'large file'
+                        print(f"  Skipping restore ({kind} placeholder): {current_file_path}")
+                    else:
+                        print(f"  Restoring: {current_file_path}")
+                        pending_writes[full_output_path] = (start, end)
+
+                _make_dirs(output_dir, parent_dirs)
+
+                # The directories exist, so the writes are independent; run them on a thread pool
+                with concurrent.futures.ThreadPoolExecutor(max_workers=RESTORE_WORKERS) as executor:
+                    writes = [
+                        (full_output_path, executor.submit(_restore_file, full_output_path, mm, start, end))
+                        for full_output_path, (start, end) in pending_writes.items()
+                    ]
+                    for full_output_path, future in writes:
+                        try:
+                            future.result()
+                        except IOError as e:
+                            print(f"Error writing file {full_output_path}: {e}")
+                        except Exception as e:
+                            print(f"An unexpected error occurred writing {full_output_path}: {e}")
 
         print(f"\nSuccessfully finished attempting restoration to {output_dir}")
 
@@ -435,6 +1127,16 @@ def restore_repo(input_file: Path, output_dir: Path):
         print(f"An unexpected error occurred during restoration: {e}")
 
 
+def _non_negative_int(value: str) -> int:
+    """argparse type for byte counts: an int that is 0 or more."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid byte count: {value!r}")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {number}")
+    return number
+
 def main():
     """
     Parses command-line arguments and executes the dump or restore action.
@@ -461,6 +1163,19 @@ def main():
         help='Glob patterns for files/directories to exclude.',
         metavar='PATTERN'
     )
+    dump_parser.add_argument(
+        '--max-file-size',
+        type=_non_negative_int,
+        default=MAX_FILE_SIZE,
+        help="Files larger than this many bytes get a placeholder instead of their content (default: 0, no limit).",
+        metavar='BYTES'
+    )
+    dump_parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help=f"Copy unchanged files' contents from the previous dump at the same output path "
+             f"instead of re-reading them (tracked in an '<output>{DUMP_INDEX_SUFFIX}' sidecar file)."
+    )
 
 
     # --- Restore arguments ---
@@ -473,7 +1188,7 @@ def main():
     if args.command == 'dump':
         repo_path = args.repo.resolve()
         output_path = args.output.resolve()
-        dump_repo(repo_path, output_path, args.include, args.exclude)
+        dump_repo(repo_path, output_path, args.include, args.exclude, args.incremental, args.max_file_size)
     elif args.command == 'restore':
         input_path = args.input.resolve()
         dest_path = args.dest.resolve()
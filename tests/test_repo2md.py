@@ -0,0 +1,289 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import repo2md
+
+
+def _make_files(root: Path, files: dict) -> None:
+    for relative_path, content in files.items():
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def _list(root: Path, include=None, exclude=None) -> list:
+    files = repo2md.list_files(root, repo2md.load_gitignore(root), include, exclude, root / 'no_output.md')
+    return [path.as_posix() for path in files]
+
+
+def test_list_files_skips_git_pointer_files(tmp_path):
+    # Worktrees and submodules have a '.git' file instead of a directory
+    _make_files(tmp_path, {'.git': 'gitdir: elsewhere\n', 'sub/.git': 'gitdir: elsewhere\n', 'sub/a.py': ''})
+    (tmp_path / 'repo' / '.git').mkdir(parents=True)
+    (tmp_path / 'repo' / '.git' / 'HEAD').write_text('ref: refs/heads/main\n')
+    assert _list(tmp_path) == ['sub/a.py']
+
+
+def test_list_files_double_star_tail_does_not_prune_directory(tmp_path):
+    # 'foo/**' matches what is inside foo/, not foo/ itself, so a '!' pattern can re-include a file
+    _make_files(tmp_path, {'.gitignore': 'foo/**\n!foo/keep.txt\na/**\n!d.py\n',
+                           'foo/keep.txt': '', 'foo/drop.txt': '', 'a/d.py': '', 'a/e.txt': ''})
+    assert _list(tmp_path) == ['.gitignore', 'a/d.py', 'foo/keep.txt']
+
+
+def test_list_files_exclude_double_star_tail_does_not_prune_directory(tmp_path):
+    _make_files(tmp_path, {'foo/keep.txt': '', 'foo/drop.txt': '', 'bar.txt': ''})
+    assert _list(tmp_path, exclude=['foo/**', '!foo/keep.txt']) == ['bar.txt', 'foo/keep.txt']
+
+
+def test_list_files_ignored_directory_is_still_pruned(tmp_path):
+    # As in git, a file cannot be re-included once its parent directory is ignored
+    _make_files(tmp_path, {'.gitignore': 'foo/\n!foo/keep.txt\n', 'foo/keep.txt': '', 'bar.txt': ''})
+    assert _list(tmp_path) == ['.gitignore', 'bar.txt']
+
+
+def test_dump_repo_filters_sidecars_only_when_incremental(tmp_path):
+    _make_files(tmp_path, {'a.py': 'print(1)\n', 'dump.md.idx': 'not a sidecar\n', 'dump.md.tmp': 'nor this\n'})
+    output = tmp_path / 'dump.md'
+    repo2md.dump_repo(tmp_path, output, None, None)
+    assert repo2md.FILE_NAME_MARKER + 'dump.md.idx' in output.read_text()
+    assert repo2md.FILE_NAME_MARKER + 'dump.md.tmp' in output.read_text()
+    repo2md.dump_repo(tmp_path, output, None, None, incremental=True)
+    assert repo2md.FILE_NAME_MARKER + 'dump.md.idx' not in output.read_text()
+    assert repo2md.FILE_NAME_MARKER + 'dump.md.tmp' not in output.read_text()
+
+
+def test_dump_repo_removes_temporary_dump_on_failure(tmp_path, monkeypatch):
+    repo = tmp_path / 'repo'
+    _make_files(repo, {'a.py': 'print(1)\n'})
+    output = tmp_path / 'dump.md'
+    repo2md.dump_repo(repo, output, None, None, incremental=True)
+    os.utime(repo / 'a.py', ns=(0, 0)) # Old enough to be indexed
+    repo2md.dump_repo(repo, output, None, None, incremental=True)
+    previous = output.read_bytes()
+
+    def fail(*args):
+        raise OSError('disk full')
+    monkeypatch.setattr(repo2md, '_copy_into_dump', fail)
+    repo2md.dump_repo(repo, output, None, None, incremental=True)
+    assert not (tmp_path / 'dump.md.tmp').exists()
+    assert output.read_bytes() == previous
+
+
+_EQUIVALENCE_PATTERNS = [
+    ('*.py',),
+    ('*.log', '*.tmp', '*.min.js', '!keep.log'),
+    ('build/', '!build/keep.txt'),
+    ('/docs', 'src/*.md', '!src/README.md', '*.md'),
+    ('a/**/b', '**/c.txt', 'x?.py', '[ab].txt'),
+    ('foo/**', '!foo/keep.txt', '!*.py', 'foo/*.py'),
+    ('*', '!*/', '!*.py'),
+    ('\\#hash', 'trailing\\ ', 'dir/sub/'),
+]
+_EQUIVALENCE_PATHS = [
+    'a.py', 'src/a.py', 'app.log', 'logs/app.log', 'keep.log', 'logs/keep.log', 'app.log.1', 'a.min.js',
+    'x.tmp/inner.txt', 'build/a.txt', 'build/keep.txt', 'src/build/a.txt', 'build', 'docs/index.md',
+    'src/docs/a.md', 'src/a.md', 'src/README.md', 'src/sub/a.md', 'a/b', 'a/x/y/b', 'a/b/c', 'c.txt',
+    'deep/c.txt', 'xy.py', 'xyz.py', 'a.txt', 'c.txt', 'foo/a.txt', 'foo/keep.txt', 'foo/a.py', 'foo/x/a.py',
+    '#hash', 'trailing ', 'dir/sub/a', 'other/dir/sub/a',
+]
+
+
+def test_compiled_matcher_agrees_with_pathspec():
+    for patterns in _EQUIVALENCE_PATTERNS:
+        spec = repo2md._compile_spec(patterns)
+        match = repo2md._compile_matcher(spec)
+        for path in _EQUIVALENCE_PATHS:
+            assert bool(match(path)) == spec.match_file(path), (patterns, path)
+
+
+def test_dump_repo_size_limit_keeps_binary_placeholder(tmp_path):
+    repo = tmp_path / 'repo'
+    _make_files(repo, {'big.txt': 'x' * 100, 'small.txt': 'y\n'})
+    (repo / 'big.blob').write_bytes(b'\x00' * 100) # Not in BINARY_EXTENSIONS
+    output = tmp_path / 'dump.md'
+    repo2md.dump_repo(repo, output, None, None)
+    assert repo2md.LARGE_FILE_PLACEHOLDER.format(size=100) not in output.read_text()
+    repo2md.dump_repo(repo, output, None, None, max_file_size=10)
+    dump = output.read_text()
+    assert repo2md.LARGE_FILE_PLACEHOLDER.format(size=100) in dump
+    assert dump.count(repo2md.LARGE_FILE_PLACEHOLDER.format(size=100)) == 1
+    assert dump.index(repo2md.FILE_NAME_MARKER + 'big.blob') > dump.index(repo2md.FILE_NAME_MARKER + 'small.txt')
+    assert repo2md.BINARY_PLACEHOLDER in dump[dump.index(repo2md.FILE_NAME_MARKER + 'big.blob'):]
+
+
+def test_dump_repo_reads_wavefront_obj_files(tmp_path):
+    # '.obj' is also the text-based Wavefront format, so it must go through the NUL check
+    repo = tmp_path / 'repo'
+    _make_files(repo, {'mesh.obj': 'v 0.0 1.0 0.0\n'})
+    output = tmp_path / 'dump.md'
+    repo2md.dump_repo(repo, output, None, None)
+    assert 'v 0.0 1.0 0.0\n' in output.read_text()
+    assert repo2md.BINARY_PLACEHOLDER not in output.read_text()
+
+
+def test_dump_repo_rejects_negative_max_file_size(tmp_path):
+    repo = tmp_path / 'repo'
+    _make_files(repo, {'a.py': ''})
+    output = tmp_path / 'dump.md'
+    repo2md.dump_repo(repo, output, None, None, max_file_size=-1)
+    assert not output.exists()
+
+
+def _block(relative_path: str, content: bytes) -> bytes:
+    """The dump block for a file, as dump_repo writes it."""
+    language = Path(relative_path).suffix[1:]
+    return (f"{repo2md.FILE_NAME_MARKER}{relative_path}\n{repo2md.CODE_BLOCK_MARKER}{language}\n".encode('utf-8')
+            + content + f"{repo2md.CODE_BLOCK_MARKER}\n".encode('utf-8'))
+
+
+@pytest.mark.parametrize('sendfile', [True, False])
+def test_dump_repo_streams_clean_utf8_byte_for_byte(tmp_path, monkeypatch, sendfile):
+    monkeypatch.setattr(repo2md, '_HAS_SENDFILE', repo2md._HAS_SENDFILE and sendfile)
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    # A 3-byte character straddling the first STREAM_CHUNK_SIZE boundary
+    clean = b'a' * (repo2md.STREAM_CHUNK_SIZE - 1) + '€'.encode('utf-8') + b'\nend'
+    (repo / 'clean.txt').write_bytes(clean)
+    (repo / 'crlf.txt').write_bytes(b'line\r\n' * (repo2md.STREAM_MIN_SIZE // 6 + 1))
+    (repo / 'latin1.txt').write_bytes(b'caf\xe9\n' * (repo2md.STREAM_MIN_SIZE // 5 + 1))
+    kind, (src, size) = repo2md._read_for_dump(repo / 'clean.txt')
+    src.close()
+    assert (kind, size) == ('stream', len(clean))
+    assert repo2md._read_for_dump(repo / 'crlf.txt')[0] == 'text'
+    assert repo2md._read_for_dump(repo / 'latin1.txt')[0] == 'text'
+
+    output = tmp_path / 'dump.md'
+    repo2md.dump_repo(repo, output, None, None)
+    dump = output.read_bytes()
+    assert _block('clean.txt', clean + b'\n') in dump
+    assert _block('crlf.txt', b'line\n' * (repo2md.STREAM_MIN_SIZE // 6 + 1)) in dump
+    assert _block('latin1.txt', b'caf\n' * (repo2md.STREAM_MIN_SIZE // 5 + 1)) in dump
+
+
+def test_dump_repo_stream_survives_file_changing_after_check(tmp_path, monkeypatch):
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    content = b'x' * repo2md.STREAM_MIN_SIZE + b'\n'
+    (repo / 'rotated.log').write_bytes(content)
+    (repo / 'shrunk.log').write_bytes(content)
+    read_for_dump = repo2md._read_for_dump
+
+    def read_then_change(file_path, max_file_size=0):
+        outcome = read_for_dump(file_path, max_file_size)
+        if file_path.name == 'rotated.log':
+            # Replaced by a new file: the checked file still gets dumped
+            (repo / 'new.log').write_bytes(b'rotated, no newline')
+            os.replace(repo / 'new.log', file_path)
+        else:
+            # Truncated in place: the block must still be well-formed
+            file_path.write_bytes(b'shrunk, no newline')
+        return outcome
+    monkeypatch.setattr(repo2md, '_read_for_dump', read_then_change)
+    output = tmp_path / 'dump.md'
+    repo2md.dump_repo(repo, output, None, None)
+    dump = output.read_bytes()
+    assert _block('rotated.log', content) in dump
+    assert _block('shrunk.log', b'shrunk, no newline\n'
+                  + f"Error reading file: it shrank to 18 of {len(content)} bytes while being dumped\n".encode('utf-8')) in dump
+
+
+def test_dump_repo_incremental_matches_full_dump_after_edit(tmp_path, capsys):
+    repo = tmp_path / 'repo'
+    _make_files(repo, {'a.py': 'print(1)\n', 'b/c.txt': 'same\n', 'b/d.md': 'old\n'})
+    (repo / 'e.bin').write_bytes(b'\x00\x01')
+    for path in repo.rglob('*'):
+        os.utime(path, ns=(0, 0)) # Old enough to be indexed
+    output = tmp_path / 'inc.md'
+    repo2md.dump_repo(repo, output, None, None, incremental=True)
+    (repo / 'b' / 'd.md').write_text('new, and longer than before\n')
+    os.utime(repo / 'b' / 'd.md', ns=(10**9, 10**9))
+    capsys.readouterr()
+    repo2md.dump_repo(repo, output, None, None, incremental=True)
+    assert '3 of 4 files unchanged' in capsys.readouterr().out
+    full = tmp_path / 'full.md'
+    repo2md.dump_repo(repo, full, None, None)
+    assert output.read_bytes() == full.read_bytes()
+    assert b'new, and longer than before\n' in full.read_bytes()
+
+
+@pytest.mark.parametrize('entry', [
+    lambda mtime, size: 5,
+    lambda mtime, size: [mtime, size],
+    lambda mtime, size: [mtime, size, 0, 'x'],
+    lambda mtime, size: [mtime, size, 5, 2],
+    lambda mtime, size: [mtime, size, 0, 10**9],
+    lambda mtime, size: [mtime, size, True, 1],
+])
+def test_dump_repo_ignores_malformed_index(tmp_path, entry):
+    repo = tmp_path / 'repo'
+    _make_files(repo, {'a.txt': 'hello\n'})
+    os.utime(repo / 'a.txt', ns=(0, 0))
+    output = tmp_path / 'dump.md'
+    repo2md.dump_repo(repo, output, None, None, incremental=True)
+    expected = output.read_bytes()
+    index_path = tmp_path / ('dump.md' + repo2md.DUMP_INDEX_SUFFIX)
+    index = json.loads(index_path.read_text())
+    index['files'] = {'a.txt': entry(0, len('hello\n'))}
+    index_path.write_text(json.dumps(index))
+    repo2md.dump_repo(repo, output, None, None, incremental=True)
+    assert output.read_bytes() == expected
+
+
+def test_dump_repo_ignores_index_of_another_repo(tmp_path):
+    output = tmp_path / 'dump.md'
+    for name, content in (('one', 'first\n'), ('two', 'other\n')):
+        repo = tmp_path / name
+        _make_files(repo, {'a.txt': content})
+        os.utime(repo / 'a.txt', ns=(0, 0)) # Same path, mtime and size in both
+        repo2md.dump_repo(repo, output, None, None, incremental=True)
+    assert b'other\n' in output.read_bytes()
+
+
+def test_list_files_nested_gitignores_match_git(tmp_path):
+    # Expected list checked against `git ls-files --others --exclude-standard`
+    _make_files(tmp_path, {
+        '.gitignore': '*.log\nbuild\n',
+        'a/.gitignore': '!keep.log\n/x\n', # Re-includes over the root; '/x' is anchored to a/
+        'a/b/.gitignore': '*.txt\n!build\n', # Deepest file decides before its parents
+        'c/.gitignore': '', # Empty: falls through to the root
+    })
+    _make_files(tmp_path, {path: 'hi\n' for path in (
+        'top.log', 'keep.log', 'a/keep.log', 'a/other.log', 'a/x', 'a/build', 'a/b/x', 'a/b/t.txt',
+        'a/b/keep.log', 'a/b/build', 't.txt', 'c/t.log', 'c/build', 'c/d/f.py', 'e/x',
+    )})
+    assert sorted(_list(tmp_path)) == [
+        '.gitignore', 'a/.gitignore', 'a/b/.gitignore', 'a/b/build', 'a/b/keep.log', 'a/b/x', 'a/keep.log',
+        'c/.gitignore', 'c/d/f.py', 'e/x', 't.txt',
+    ]
+
+
+def test_dump_restore_round_trip(tmp_path, capsys):
+    repo = tmp_path / 'repo'
+    _make_files(repo, {'n/a/b/c.py': 'print(1)\n', 'empty.txt': '', 'big.txt': 'z' * 100})
+    (repo / 'nn.txt').write_bytes(b'no newline')
+    (repo / 'crlf.txt').write_bytes(b'a\r\nb\r\n')
+    (repo / 'img.png').write_bytes(b'\x00\x01')
+    dump = tmp_path / 'dump.md'
+    repo2md.dump_repo(repo, dump, None, None, max_file_size=50)
+    with dump.open('ab') as f:
+        # A later block for the same path wins; a block cut off by the end of the dump is dropped
+        f.write(_block('n/a/b/c.py', b'print(2)\n') + b'\n')
+        f.write(f"{repo2md.FILE_NAME_MARKER}cut.txt\n{repo2md.CODE_BLOCK_MARKER}txt\npartial\n".encode('utf-8'))
+    capsys.readouterr()
+    restored = tmp_path / 'restored'
+    repo2md.restore_repo(dump, restored)
+    assert "File 'cut.txt' might be incomplete and was not restored" in capsys.readouterr().out
+    assert {path.relative_to(restored).as_posix(): path.read_bytes()
+            for path in restored.rglob('*') if path.is_file()} == {
+        'n/a/b/c.py': b'print(2)\n',
+        'empty.txt': b'',
+        'nn.txt': b'no newline\n', # The dump ends every file with a newline
+        'crlf.txt': b'a\nb\n',
+    }